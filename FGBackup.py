@@ -4,24 +4,62 @@ Fortinet Backup CLI Tool
 A standalone command-line tool for backing up Fortinet firewall configurations.
 """
 
+import asyncio
 import os
 import sys
-import yaml
 import json
 import hashlib
 import logging
+import re
+import select
+import shutil
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import click
-import paramiko
-from colorama import init, Fore, Style
 from getpass import getpass
 
-# Initialize colorama for cross-platform colored output
-init(autoreset=True)
+# paramiko (which drags in cryptography) and yaml are imported lazily so
+# metadata-only commands like list-backups and verify start quickly
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to stdlib json
+    orjson = None
+
+try:
+    import zstandard as zstd
+except ImportError:  # optional, backups are stored uncompressed
+    zstd = None
+
+def _yaml():
+    """Import yaml on first use, preferring the libyaml-backed classes."""
+    import yaml
+    try:
+        # libyaml-backed parser, an order of magnitude faster than pure Python
+        from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+    except ImportError:
+        from yaml import SafeLoader as Loader, SafeDumper as Dumper
+    return yaml, Loader, Dumper
+
+# Colorize output only when a human is watching; colorama's stream wrapper
+# scans every write, and ANSI codes are just noise in piped output
+if sys.stdout.isatty():
+    from colorama import init, Fore, Style
+    init(autoreset=True)
+else:
+    class _NoColor:
+        """Stands in for colorama's Fore/Style when output is piped."""
+        def __getattr__(self, name):
+            return ''
+
+    Fore = Style = _NoColor()
 
 # Configure logging
 logging.basicConfig(
@@ -34,6 +72,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Common FortiOS prompts, matched against the tail of the receive buffer
+_PROMPT_RE = re.compile(rb'# |\$ |> |login:|Password:')
+
+# First line of actual configuration in command output
+_CONFIG_START_RE = re.compile(r'#config-version=|config ')
+
+# Command prompts, echoes, and pagination artifacts to drop while cleaning
+_CONFIG_SKIP_RE = re.compile(
+    r'[#$]$|^show|^--More--$|Handling pagination\.\.\.|Downloaded:')
+
+# Characters that are unsafe in filenames, each mapped to an underscore
+_SANITIZE_TABLE = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# AEAD ciphers with hardware-accelerated implementations, fastest first;
+# bulk transfer throughput is dominated by the negotiated cipher
+_FAST_CIPHERS = (
+    'aes128-gcm@openssh.com',
+    'aes256-gcm@openssh.com',
+    'chacha20-poly1305@openssh.com',
+)
+
+_paramiko_tuned = False
+
+
+def _tune_paramiko():
+    """Reorder paramiko's cipher preferences so AEAD ciphers are negotiated first."""
+    global _paramiko_tuned
+    if _paramiko_tuned:
+        return
+    import paramiko
+    available = paramiko.Transport._preferred_ciphers
+    fast = [c for c in _FAST_CIPHERS if c in available]
+    rest = [c for c in available if c not in _FAST_CIPHERS]
+    paramiko.Transport._preferred_ciphers = tuple(fast + rest)
+    _paramiko_tuned = True
+
+
+class SSHPool:
+    """Keeps established SSH sessions for reuse, keyed by (host, port, username)."""
+
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key) -> Optional[Tuple]:
+        """Return an idle (ssh, shell) pair for key, or None if none is alive."""
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                ssh, shell = idle.popleft()
+                transport = ssh.get_transport()
+                if transport and transport.is_active():
+                    return ssh, shell
+                ssh.close()
+            return None
+
+    def release(self, key, ssh, shell):
+        """Return a session to the pool, dropping it if the transport died."""
+        transport = ssh.get_transport() if ssh else None
+        if not transport or not transport.is_active():
+            if ssh:
+                ssh.close()
+            return
+        with self._lock:
+            self._idle.setdefault(key, deque()).append((ssh, shell))
+
+
+# Shared across all FortinetSSHClient instances in this process
+_ssh_pool = SSHPool()
+
 
 class FortinetSSHClient:
     """SSH client for connecting to Fortinet devices."""
@@ -47,14 +155,29 @@ class FortinetSSHClient:
         self.ssh = None
         self.shell = None
     
+    @property
+    def _pool_key(self) -> Tuple:
+        return (self.host, self.port, self.username)
+
     def connect(self) -> bool:
-        """Establish SSH connection to Fortinet device."""
+        """Establish SSH connection to Fortinet device, reusing a pooled session if available."""
+        import paramiko
+
         try:
+            # Reuse a live session from the pool and skip the handshake
+            pooled = _ssh_pool.acquire(self._pool_key)
+            if pooled:
+                self.ssh, self.shell = pooled
+                click.echo(f"{Fore.GREEN}✓ Reusing existing connection to {self.host}")
+                logger.info(f"Reusing pooled connection to {self.host}")
+                return True
+
+            _tune_paramiko()
             self.ssh = paramiko.SSHClient()
             self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
+
             click.echo(f"{Fore.YELLOW}Connecting to {self.host}:{self.port}...")
-            
+
             self.ssh.connect(
                 hostname=self.host,
                 port=self.port,
@@ -62,101 +185,161 @@ class FortinetSSHClient:
                 password=self.password,
                 timeout=self.timeout,
                 allow_agent=False,
-                look_for_keys=False
+                look_for_keys=False,
+                # Config text compresses poorly enough over a LAN that zlib
+                # costs more CPU than the bytes it saves
+                compress=False
             )
-            
+
+            # Keep the session alive while it sits idle in the pool
+            self.ssh.get_transport().set_keepalive(15)
+
             # Create interactive shell for FortiOS
             self.shell = self.ssh.invoke_shell()
-            
+
             # Wait for initial prompt and clear it
             self._wait_for_prompt()
-            
+
             click.echo(f"{Fore.GREEN}✓ Connected successfully to {self.host}")
             logger.info(f"Successfully connected to {self.host}")
             return True
-            
+
         except Exception as e:
             click.echo(f"{Fore.RED}✗ Connection failed to {self.host}: {str(e)}")
             logger.error(f"Connection failed to {self.host}: {str(e)}")
             return False
-    
+
     def disconnect(self):
-        """Close SSH connection."""
-        if self.shell:
-            self.shell.close()
+        """Release the SSH session back to the pool for reuse."""
         if self.ssh:
-            self.ssh.close()
+            _ssh_pool.release(self._pool_key, self.ssh, self.shell)
+            self.ssh = None
+            self.shell = None
         click.echo(f"{Fore.BLUE}Disconnected from {self.host}")
     
     def _wait_for_prompt(self, timeout: int = 10) -> str:
         """Wait for command prompt and return output."""
-        output = ""
-        start_time = datetime.now()
-        
+        buf = bytearray()
+        deadline = time.monotonic() + timeout
+
         while True:
-            if self.shell.recv_ready():
-                data = self.shell.recv(1024).decode('utf-8', errors='ignore')
-                output += data
-                
-                # Look for common FortiOS prompts
-                if any(prompt in output for prompt in ['# ', '$ ', '> ', 'login:', 'Password:']):
-                    break
-            
-            if (datetime.now() - start_time).seconds > timeout:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 break
-        
-        return output
+
+            # Block until data is ready (or timeout) instead of polling
+            readable, _, _ = select.select([self.shell], [], [], remaining)
+            if not readable:
+                continue
+
+            data = self.shell.recv(65536)
+            if not data:
+                # Channel EOF: the peer closed; selecting again would spin
+                break
+            buf.extend(data)
+
+            # Look for a prompt in the newly arrived tail only, not the whole buffer
+            scan_from = max(0, len(buf) - len(data) - 16)
+            if _PROMPT_RE.search(buf, scan_from):
+                break
+
+        # Decode once at the end instead of per chunk
+        return bytes(buf).decode('utf-8', errors='ignore')
     
-    def execute_command(self, command: str, timeout: int = 30, show_progress: bool = False) -> Tuple[bool, str]:
-        """Execute command on Fortinet device."""
+    def execute_command(self, command: str, timeout: int = 30, show_progress: bool = False,
+                        sink: Optional[Callable[[bytes], None]] = None) -> Tuple[bool, str]:
+        """Execute command on Fortinet device.
+
+        If a sink is given, output bytes are streamed into it as they arrive
+        (keeping only a small tail in memory for prompt detection) and the
+        returned output string is empty.
+        """
         try:
             if not self.shell:
                 return False, "No active SSH connection"
-            
+
             # Send command
             self.shell.send(command + '\n')
-            
+
+            # Progress output is pointless (and costly) when piped to a file
+            show_progress = show_progress and sys.stdout.isatty()
+
             # Initialize tracking
-            output = ""
-            start_time = datetime.now()
-            last_size = 0
-            
+            buf = bytearray()
+            tail = bytearray()
+            received = 0
+            deadline = time.monotonic() + timeout
+            last_echo = 0.0
+
             if show_progress:
                 click.echo(f"{Fore.YELLOW}📥 Downloading configuration data...")
-            
+
             while True:
-                if self.shell.recv_ready():
-                    data = self.shell.recv(4096).decode('utf-8', errors='ignore')
-                    output += data
-                    
-                    # Show simple progress
-                    if show_progress and len(output) > last_size + 5000:  # Every 5KB
-                        click.echo(f"{Fore.CYAN}   Downloaded: {len(output):,} bytes...")
-                        last_size = len(output)
-                        
+                now = time.monotonic()
+                remaining = deadline - now
+                if remaining <= 0:
+                    click.echo(f"{Fore.RED}⏰ Command timeout reached")
+                    break
+
+                # Block until data is ready (or timeout) instead of polling
+                readable, _, _ = select.select([self.shell], [], [], remaining)
+                if not readable:
+                    continue
+
+                data = self.shell.recv(65536)
+                if not data:
+                    # Channel EOF: the peer closed mid-command; selecting
+                    # again would report readable forever and spin the CPU
+                    logger.error(f"Connection to {self.host} closed while running: {command}")
+                    return False, "Connection closed by device"
+                received += len(data)
+
+                # Show simple progress, throttled so terminal writes don't
+                # serialize the receive loop
+                if show_progress and now - last_echo >= 0.25:
+                    click.echo(f"{Fore.CYAN}   Downloaded: {received:,} bytes...")
+                    last_echo = now
+
+                if sink is not None:
+                    # Keep a rolling tail for prompt detection, flush the rest
+                    tail.extend(data)
+                    if len(tail) > 512:
+                        sink(bytes(tail[:-512]))
+                        del tail[:-512]
+
                     # Handle pagination - look for "--More--" prompt
-                    if "--More--" in data:
+                    if b"--More--" in data:
                         click.echo(f"{Fore.YELLOW}📄 Handling pagination...")
                         self.shell.send(' ')  # Send space to continue
                         continue
-                    
+
                     # Check if command completed (look for prompt)
-                    if output.strip().endswith('#') or output.strip().endswith('$'):
+                    if tail[-32:].strip().endswith((b'#', b'$')):
                         break
-                
-                # Check timeout
-                if (datetime.now() - start_time).seconds > timeout:
-                    click.echo(f"{Fore.RED}⏰ Command timeout reached")
-                    break
-                    
-                # Small delay to prevent excessive CPU usage
-                time.sleep(0.01)
-            
+                else:
+                    buf.extend(data)
+
+                    # Handle pagination - look for "--More--" prompt
+                    if b"--More--" in data:
+                        click.echo(f"{Fore.YELLOW}📄 Handling pagination...")
+                        self.shell.send(' ')  # Send space to continue
+                        continue
+
+                    # Check if command completed (look for prompt); only the
+                    # last few bytes can matter, so never strip the whole buffer
+                    if buf[-32:].strip().endswith((b'#', b'$')):
+                        break
+
+            # Flush whatever is left of the tail to the sink
+            if sink is not None and tail:
+                sink(bytes(tail))
+
             if show_progress:
-                click.echo(f"{Fore.GREEN}✅ Download complete: {len(output):,} bytes")
-            
-            return True, output
-            
+                click.echo(f"{Fore.GREEN}✅ Download complete: {received:,} bytes")
+
+            # Decode once at the end instead of per chunk
+            return True, bytes(buf).decode('utf-8', errors='ignore')
+
         except Exception as e:
             logger.error(f"Command execution failed: {str(e)}")
             return False, str(e)
@@ -178,49 +361,75 @@ class FortinetSSHClient:
         
         return info
     
-    def backup_configuration(self, backup_type: str = 'full') -> Tuple[bool, str, Dict]:
-        """Backup Fortinet configuration."""
+    def backup_configuration(self, backup_type: str = 'full') -> Tuple[bool, object, Dict]:
+        """Backup Fortinet configuration.
+
+        On success the second element is a dict describing a temporary file
+        holding the cleaned configuration ('path', 'size', 'checksum');
+        save_backup moves it into its final location. On failure it is an
+        error message string.
+        """
         try:
             # Configure console settings to disable pagination
             click.echo(f"{Fore.YELLOW}⚙️  Configuring console...")
             self.execute_command("config system console")
             self.execute_command("set output standard")
             self.execute_command("end")
-            
+
             # Determine backup command
             if backup_type == 'full':
                 command = "show full-configuration"
             else:
                 command = "show"
-            
+
             click.echo(f"{Fore.CYAN}🚀 Executing backup command: {command}")
             click.echo(f"{Fore.YELLOW}Large configurations may take several minutes...")
-            
-            # Execute backup command with progress
-            success, config_data = self.execute_command(command, timeout=120, show_progress=True)
-            
-            if not success:
-                return False, "Failed to execute backup command", {}
-            
-            # Get system info
-            click.echo(f"{Fore.YELLOW}📊 Gathering system information...")
-            system_info = self.get_system_info()
-            
-            # Clean configuration data
-            click.echo(f"{Fore.YELLOW}🧹 Processing configuration...")
-            config_data = self._clean_config_output(config_data)
-            
-            if len(config_data.strip()) < 100:
-                return False, "Configuration data seems incomplete", {}
-            
-            click.echo(f"{Fore.GREEN}✅ Configuration backup completed ({len(config_data):,} bytes)")
-            return True, config_data, system_info
-            
+
+            # Stream the raw command output to a temporary file
+            raw_file = tempfile.NamedTemporaryFile(prefix='fgbackup_raw_', delete=False)
+            try:
+                with raw_file:
+                    success, _ = self.execute_command(command, timeout=120,
+                                                      show_progress=True, sink=raw_file.write)
+
+                if not success:
+                    return False, "Failed to execute backup command", {}
+
+                # Get system info
+                click.echo(f"{Fore.YELLOW}📊 Gathering system information...")
+                system_info = self.get_system_info()
+
+                # Clean configuration data while hashing it incrementally
+                click.echo(f"{Fore.YELLOW}🧹 Processing configuration...")
+                hasher = hashlib.sha256()
+                cleaned_file = tempfile.NamedTemporaryFile(prefix='fgbackup_cfg_', delete=False)
+                try:
+                    with cleaned_file:
+                        size = self._clean_config_stream(raw_file.name, cleaned_file, hasher)
+
+                    if size < 100:
+                        os.unlink(cleaned_file.name)
+                        return False, "Configuration data seems incomplete", {}
+                except Exception:
+                    os.unlink(cleaned_file.name)
+                    raise
+            finally:
+                os.unlink(raw_file.name)
+
+            click.echo(f"{Fore.GREEN}✅ Configuration backup completed ({size:,} bytes)")
+            backup_result = {
+                'path': cleaned_file.name,
+                'size': size,
+                'checksum': hasher.hexdigest()
+            }
+            return True, backup_result, system_info
+
         except Exception as e:
             logger.error(f"Backup failed: {str(e)}")
             return False, str(e), {}
     
-    def _clean_config_output(self, output: str) -> str:
+    @staticmethod
+    def _clean_config_output(output: str) -> str:
         """Clean configuration output by removing command echoes, prompts, and pagination artifacts."""
         lines = output.split('\n')
         cleaned_lines = []
@@ -228,21 +437,16 @@ class FortinetSSHClient:
         skip_until_config = True
         for line in lines:
             line_stripped = line.strip()
-            
+
             # Skip until we find the actual configuration
             if skip_until_config:
-                if line_stripped.startswith('#config-version=') or line_stripped.startswith('config '):
+                if _CONFIG_START_RE.match(line_stripped):
                     skip_until_config = False
                     cleaned_lines.append(line)
                 continue
-            
+
             # Skip command prompts, echoes, and pagination artifacts
-            if (line_stripped.endswith('#') or 
-                line_stripped.endswith('$') or 
-                line_stripped.startswith('show') or
-                line_stripped == '--More--' or
-                'Handling pagination...' in line_stripped or
-                'Downloaded:' in line_stripped):
+            if _CONFIG_SKIP_RE.search(line_stripped):
                 continue
             
             # Skip empty lines at the beginning but keep them in config
@@ -252,57 +456,192 @@ class FortinetSSHClient:
         # Remove trailing empty lines
         while cleaned_lines and not cleaned_lines[-1].strip():
             cleaned_lines.pop()
-        
+
         return '\n'.join(cleaned_lines)
 
+    @staticmethod
+    def _clean_config_stream(raw_path: str, out_file, hasher) -> int:
+        """Stream-clean raw command output into a file, updating hasher.
+
+        Applies the same filtering as _clean_config_output one line at a
+        time so the raw capture never has to be held in memory. Returns
+        the number of bytes written.
+        """
+        written = 0
+        skip_until_config = True
+        pending_blanks = 0
+
+        def _emit(line: str):
+            nonlocal written
+            data = line.encode('utf-8')
+            if written:
+                data = b'\n' + data
+            out_file.write(data)
+            hasher.update(data)
+            written += len(data)
+
+        with open(raw_path, 'r', encoding='utf-8', errors='ignore') as raw:
+            for line in raw:
+                line = line.rstrip('\n')
+                line_stripped = line.strip()
+
+                # Skip until we find the actual configuration
+                if skip_until_config:
+                    if _CONFIG_START_RE.match(line_stripped):
+                        skip_until_config = False
+                        _emit(line)
+                    continue
+
+                # Skip command prompts, echoes, and pagination artifacts
+                if _CONFIG_SKIP_RE.search(line_stripped):
+                    continue
+
+                # Buffer blank lines so trailing ones are never written
+                if not line_stripped:
+                    pending_blanks += 1
+                    continue
+
+                for _ in range(pending_blanks):
+                    _emit('')
+                pending_blanks = 0
+                _emit(line)
+
+        return written
+
+
+def _load_metadata(path) -> Dict:
+    """Parse a backup metadata JSON file, using orjson when available."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _dump_metadata(metadata: Dict, path):
+    """Write a backup metadata JSON file, using orjson when available."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, default=str)
+
 
 class BackupManager:
     """Manages backup files and operations."""
     
+    # Trained zstd dictionary stored next to the device directories
+    DICT_FILENAME = 'fortios.zdict'
+
     def __init__(self, base_path: str = "./backups"):
         self.base_path = Path(base_path)
         self.base_path.mkdir(exist_ok=True)
-        
-    def save_backup(self, device_name: str, config_data: str, backup_type: str, 
+        self._dict_data = None
+        self._dict_loaded = False
+
+    def _dictionary(self):
+        """Load the trained zstd dictionary, if one exists (see train-dict)."""
+        if not self._dict_loaded:
+            self._dict_loaded = True
+            dict_path = self.base_path / self.DICT_FILENAME
+            if zstd is not None and dict_path.exists():
+                self._dict_data = zstd.ZstdCompressionDict(dict_path.read_bytes())
+        return self._dict_data
+
+    def _compressor(self):
+        """Build the zstd compressor used for backup writes."""
+        dict_data = self._dictionary()
+        if dict_data is not None:
+            return zstd.ZstdCompressor(level=10, threads=-1, dict_data=dict_data)
+        return zstd.ZstdCompressor(level=10, threads=-1)
+
+    def _decompressor(self, config_path: Optional[Path] = None):
+        """Build the zstd decompressor used for backup reads.
+
+        When config_path is given, the dictionary is resolved from that
+        backup's root (two levels up, next to the device directories), so
+        verification works even when the manager was created with a
+        different base_path than the backup lives under.
+        """
+        dict_data = None
+        if config_path is not None:
+            dict_path = config_path.parent.parent / self.DICT_FILENAME
+            if dict_path.exists():
+                dict_data = zstd.ZstdCompressionDict(dict_path.read_bytes())
+        if dict_data is None:
+            dict_data = self._dictionary()
+        if dict_data is not None:
+            return zstd.ZstdDecompressor(dict_data=dict_data)
+        return zstd.ZstdDecompressor()
+
+
+    def save_backup(self, device_name: str, config_data, backup_type: str,
                    system_info: Dict) -> Tuple[bool, str]:
-        """Save backup to file with metadata."""
+        """Save backup to file with metadata.
+
+        config_data is either the configuration text or a dict describing a
+        streamed temporary file ('path', 'size', 'checksum') as produced by
+        FortinetSSHClient.backup_configuration.
+        """
         try:
             click.echo(f"{Fore.YELLOW}💾 Saving backup...")
-            
+
             # Create device directory
             device_path = self.base_path / self._sanitize_filename(device_name)
             device_path.mkdir(exist_ok=True)
-            
-            # Generate filename
+
+            # Generate filename; configs compress well, so store zstd when available
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{device_name}_{backup_type}_{timestamp}.cfg"
+            base_name = f"{device_name}_{backup_type}_{timestamp}"
+            compress = zstd is not None
+            filename = base_name + ('.cfg.zst' if compress else '.cfg')
             filepath = device_path / filename
-            
-            # Calculate checksum
-            checksum = hashlib.sha256(config_data.encode()).hexdigest()
-            
-            # Save configuration file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(config_data)
-            
-            # Create metadata
+
+            if isinstance(config_data, dict):
+                # Streamed backup: compress or move the temporary file into place
+                file_size = config_data['size']
+                checksum = config_data['checksum']
+                if compress:
+                    with open(config_data['path'], 'rb') as src, open(filepath, 'wb') as dst:
+                        self._compressor().copy_stream(src, dst)
+                    os.unlink(config_data['path'])
+                else:
+                    try:
+                        os.replace(config_data['path'], filepath)
+                    except OSError:
+                        # Temp directory may live on a different filesystem
+                        shutil.move(config_data['path'], filepath)
+            else:
+                # Encode once, then hash and write the same bytes
+                encoded = config_data.encode('utf-8')
+                checksum = hashlib.sha256(encoded).hexdigest()
+                file_size = len(encoded)
+
+                # Save configuration file
+                if compress:
+                    encoded = self._compressor().compress(encoded)
+                with open(filepath, 'wb') as f:
+                    f.write(encoded)
+
+            # Create metadata (file_size and checksum describe the uncompressed config)
             metadata = {
                 'device_name': device_name,
                 'backup_type': backup_type,
                 'timestamp': timestamp,
                 'filename': filename,
-                'file_size': len(config_data),
+                'file_size': file_size,
                 'checksum': checksum,
+                'compression': 'zstd' if compress else 'none',
                 'system_info': system_info
             }
             
             # Save metadata file
-            metadata_file = filepath.with_suffix('.json')
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, default=str)
+            metadata_file = device_path / (base_name + '.json')
+            _dump_metadata(metadata, metadata_file)
             
             click.echo(f"{Fore.GREEN}✓ Backup saved: {filepath}")
-            click.echo(f"{Fore.CYAN}  File size: {len(config_data):,} bytes")
+            click.echo(f"{Fore.CYAN}  File size: {file_size:,} bytes")
             click.echo(f"{Fore.CYAN}  Checksum: {checksum[:16]}...")
             
             logger.info(f"Backup saved for {device_name}: {filepath}")
@@ -335,30 +674,49 @@ class BackupManager:
     def _scan_device_backups(self, device_path: Path, device_name: str) -> List[Dict]:
         """Scan device directory for backups."""
         backups = []
-        
-        for metadata_file in device_path.glob("*.json"):
+
+        # One readdir gives us every filename; no per-entry stat calls
+        with os.scandir(device_path) as it:
+            entries = {entry.name: entry.path for entry in it}
+
+        metadata_names = [name for name in entries if name.endswith('.json')]
+        if not metadata_names:
+            return backups
+
+        def _load_one(name: str) -> Optional[Dict]:
+            metadata_path = entries[name]
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
+                metadata = _load_metadata(metadata_path)
+
                 # Check if corresponding config file exists
-                config_file = metadata_file.with_suffix('.cfg')
-                if config_file.exists():
-                    metadata['config_file'] = str(config_file)
-                    metadata['metadata_file'] = str(metadata_file)
-                    backups.append(metadata)
-                    
+                for ext in ('.cfg', '.cfg.zst'):
+                    config_name = name[:-5] + ext
+                    if config_name in entries:
+                        metadata['config_file'] = entries[config_name]
+                        metadata['metadata_file'] = metadata_path
+                        return metadata
+
             except Exception as e:
-                logger.warning(f"Failed to read metadata {metadata_file}: {str(e)}")
-                continue
-        
+                logger.warning(f"Failed to read metadata {metadata_path}: {str(e)}")
+            return None
+
+        # Metadata reads are dominated by file-open latency; overlap them
+        with ThreadPoolExecutor(max_workers=min(32, len(metadata_names))) as executor:
+            for metadata in executor.map(_load_one, metadata_names):
+                if metadata is not None:
+                    backups.append(metadata)
+
         return backups
     
     def verify_backup(self, config_file: str) -> Tuple[bool, str]:
         """Verify backup integrity."""
         try:
             config_path = Path(config_file)
-            metadata_path = config_path.with_suffix('.json')
+            if config_path.name.endswith('.cfg.zst'):
+                base_name = config_path.name[:-8]
+            else:
+                base_name = config_path.stem
+            metadata_path = config_path.with_name(base_name + '.json')
             
             if not config_path.exists():
                 return False, "Configuration file not found"
@@ -367,15 +725,25 @@ class BackupManager:
                 return False, "Metadata file not found"
             
             # Read metadata
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-            
-            # Read and verify config file
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = f.read()
+            metadata = _load_metadata(metadata_path)
             
-            # Calculate current checksum
-            current_checksum = hashlib.sha256(config_data.encode()).hexdigest()
+            # Hash the (decompressed) config without loading it into memory
+            with open(config_path, 'rb') as f:
+                if config_path.name.endswith('.zst'):
+                    if zstd is None:
+                        return False, "zstandard not installed, cannot verify compressed backup"
+                    hasher = hashlib.sha256()
+                    with self._decompressor(config_path).stream_reader(f) as reader:
+                        while chunk := reader.read(1 << 20):
+                            hasher.update(chunk)
+                    current_checksum = hasher.hexdigest()
+                elif hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                    current_checksum = hashlib.file_digest(f, 'sha256').hexdigest()
+                else:
+                    hasher = hashlib.sha256()
+                    while chunk := f.read(1 << 20):
+                        hasher.update(chunk)
+                    current_checksum = hasher.hexdigest()
             stored_checksum = metadata.get('checksum', '')
             
             if current_checksum == stored_checksum:
@@ -388,21 +756,96 @@ class BackupManager:
     
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for filesystem safety."""
-        import re
         # Replace invalid characters with underscores
-        return re.sub(r'[<>:"/\\|?*]', '_', filename)
+        return filename.translate(_SANITIZE_TABLE)
 
 
 def load_config(config_file: str) -> Dict:
     """Load device configuration from YAML file."""
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            yaml, loader, _ = _yaml()
+            return yaml.load(f, Loader=loader)
     except Exception as e:
         click.echo(f"{Fore.RED}✗ Failed to load config file {config_file}: {str(e)}")
         return {}
 
 
+async def _backup_one(device_config: Dict, backup_manager: 'BackupManager', backup_type: str,
+                      timeout: int, semaphore: asyncio.Semaphore) -> Tuple[str, bool, str]:
+    """Backup a single device over asyncssh (used by backup_all --parallel)."""
+    import asyncssh
+
+    device_name = device_config.get('name', 'unknown')
+
+    async def _run() -> Tuple[str, bool, str]:
+        async with asyncssh.connect(
+            device_config['host'],
+            port=device_config.get('port', 22),
+            username=device_config['username'],
+            password=device_config.get('password', ''),
+            known_hosts=None,
+            connect_timeout=timeout
+        ) as conn:
+            if backup_type == 'full':
+                command = "show full-configuration"
+            else:
+                command = "show"
+
+            # Stream stdout instead of waiting for the full buffer
+            chunks = []
+            async with conn.create_process(command) as process:
+                async for block in process.stdout:
+                    chunks.append(block)
+            config_data = ''.join(chunks)
+
+            # Gather system info over the same connection
+            system_info = {}
+            status = await conn.run("get system status")
+            for line in status.stdout.split('\n'):
+                if 'Version:' in line:
+                    system_info['version'] = line.split(':', 1)[1].strip()
+                elif 'Serial-Number:' in line:
+                    system_info['serial'] = line.split(':', 1)[1].strip()
+                elif 'Hostname:' in line:
+                    system_info['hostname'] = line.split(':', 1)[1].strip()
+
+        config_data = FortinetSSHClient._clean_config_output(config_data)
+
+        if len(config_data.strip()) < 100:
+            return device_name, False, "Configuration data seems incomplete"
+
+        # Compression and file writes would otherwise block the event loop
+        success, message = await asyncio.to_thread(
+            backup_manager.save_backup, device_name, config_data, backup_type, system_info)
+        return device_name, success, message if not success else ""
+
+    async with semaphore:
+        try:
+            # connect_timeout only covers the handshake; bound the whole backup
+            # like the sequential path bounds its backup command
+            return await asyncio.wait_for(_run(), timeout=120)
+        except asyncio.TimeoutError:
+            return device_name, False, "Backup timed out"
+        except Exception as e:
+            return device_name, False, str(e)
+
+
+def _run_parallel_backups(devices: List[Dict], backup_manager: 'BackupManager', backup_type: str,
+                          timeout: int, max_parallel: int) -> List:
+    """Run device backups concurrently and return per-device results."""
+
+    async def _gather():
+        semaphore = asyncio.Semaphore(max_parallel)
+        tasks = [
+            _backup_one(device_config, backup_manager, backup_type, timeout, semaphore)
+            for device_config in devices
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    return asyncio.run(_gather())
+
+
 def create_sample_config():
     """Create a sample configuration file."""
     sample_config = {
@@ -430,7 +873,8 @@ def create_sample_config():
     }
     
     with open('devices.yaml', 'w', encoding='utf-8') as f:
-        yaml.dump(sample_config, f, default_flow_style=False)
+        yaml, _, dumper = _yaml()
+        yaml.dump(sample_config, f, Dumper=dumper, default_flow_style=False)
     
     click.echo(f"{Fore.GREEN}✓ Sample configuration created: devices.yaml")
 
@@ -495,7 +939,8 @@ def backup(host, username, password, port, backup_type, output, timeout):
               type=click.Choice(['full', 'config']),
               help='Backup type (default: full)')
 @click.option('--parallel', is_flag=True, help='Run backups in parallel (use with caution)')
-def backup_all(config, device, backup_type, parallel):
+@click.option('--max-parallel', default=5, help='Maximum concurrent backups when --parallel (default: 5)')
+def backup_all(config, device, backup_type, parallel, max_parallel):
     """Backup multiple devices from configuration file."""
     
     # Load configuration
@@ -527,41 +972,66 @@ def backup_all(config, device, backup_type, parallel):
     total_count = len(devices)
     
     click.echo(f"{Fore.CYAN}Starting backup for {total_count} device(s)...")
-    
-    for device_config in devices:
-        device_name = device_config.get('name', 'unknown')
-        click.echo(f"\n{Fore.YELLOW}{'='*50}")
-        click.echo(f"{Fore.YELLOW}Processing device: {device_name}")
-        click.echo(f"{Fore.YELLOW}{'='*50}")
-        
-        # Create SSH client
-        client = FortinetSSHClient(
-            host=device_config['host'],
-            username=device_config['username'],
-            password=device_config.get('password', ''),
-            port=device_config.get('port', 22),
-            timeout=backup_settings.get('timeout', 30)
-        )
-        
+
+    if parallel:
         try:
-            # Connect and backup
-            if client.connect():
-                success, config_data, system_info = client.backup_configuration(backup_type)
-                
-                if success:
-                    backup_manager.save_backup(device_name, config_data, backup_type, system_info)
-                    success_count += 1
-                    click.echo(f"{Fore.GREEN}✓ {device_name}: Backup completed")
-                else:
-                    click.echo(f"{Fore.RED}✗ {device_name}: Backup failed - {config_data}")
+            import asyncssh  # noqa: F401
+        except ImportError:
+            click.echo(f"{Fore.YELLOW}⚠ asyncssh not installed, falling back to sequential backups")
+            parallel = False
+
+    if parallel:
+        results = _run_parallel_backups(
+            devices, backup_manager, backup_type,
+            backup_settings.get('timeout', 30), max_parallel
+        )
+
+        for result in results:
+            if isinstance(result, Exception):
+                click.echo(f"{Fore.RED}✗ Backup task failed: {str(result)}")
+                continue
+
+            device_name, success, message = result
+            if success:
+                success_count += 1
+                click.echo(f"{Fore.GREEN}✓ {device_name}: Backup completed")
             else:
-                click.echo(f"{Fore.RED}✗ {device_name}: Connection failed")
-                
-        except Exception as e:
-            click.echo(f"{Fore.RED}✗ {device_name}: Error - {str(e)}")
-            
-        finally:
-            client.disconnect()
+                click.echo(f"{Fore.RED}✗ {device_name}: Backup failed - {message}")
+    else:
+        for device_config in devices:
+            device_name = device_config.get('name', 'unknown')
+            click.echo(f"\n{Fore.YELLOW}{'='*50}")
+            click.echo(f"{Fore.YELLOW}Processing device: {device_name}")
+            click.echo(f"{Fore.YELLOW}{'='*50}")
+
+            # Create SSH client
+            client = FortinetSSHClient(
+                host=device_config['host'],
+                username=device_config['username'],
+                password=device_config.get('password', ''),
+                port=device_config.get('port', 22),
+                timeout=backup_settings.get('timeout', 30)
+            )
+
+            try:
+                # Connect and backup
+                if client.connect():
+                    success, config_data, system_info = client.backup_configuration(backup_type)
+
+                    if success:
+                        backup_manager.save_backup(device_name, config_data, backup_type, system_info)
+                        success_count += 1
+                        click.echo(f"{Fore.GREEN}✓ {device_name}: Backup completed")
+                    else:
+                        click.echo(f"{Fore.RED}✗ {device_name}: Backup failed - {config_data}")
+                else:
+                    click.echo(f"{Fore.RED}✗ {device_name}: Connection failed")
+
+            except Exception as e:
+                click.echo(f"{Fore.RED}✗ {device_name}: Error - {str(e)}")
+
+            finally:
+                client.disconnect()
     
     # Summary
     click.echo(f"\n{Fore.CYAN}{'='*50}")
@@ -625,6 +1095,86 @@ def verify(backup_file):
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--device', help='Verify backups for specific device only')
+@click.option('--path', default='./backups', help='Backup directory (default: ./backups)')
+def verify_all(device, path):
+    """Verify integrity of all backup files."""
+
+    backup_manager = BackupManager(path)
+    backups = backup_manager.list_backups(device)
+
+    if not backups:
+        if device:
+            click.echo(f"{Fore.YELLOW}No backups found for device: {device}")
+        else:
+            click.echo(f"{Fore.YELLOW}No backups found in: {path}")
+        return
+
+    def _verify_one(backup: Dict) -> Tuple[Dict, bool, str]:
+        success, message = backup_manager.verify_backup(backup['config_file'])
+        return backup, success, message
+
+    # SHA-256 releases the GIL inside OpenSSL, so threads scale with cores
+    failed = 0
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for backup, success, message in executor.map(_verify_one, backups):
+            label = f"{backup.get('device_name', 'unknown')}/{backup.get('filename', '?')}"
+            if success:
+                click.echo(f"{Fore.GREEN}✓ {label}")
+            else:
+                failed += 1
+                click.echo(f"{Fore.RED}✗ {label}: {message}")
+
+    click.echo(f"\n{Fore.CYAN}Verified {len(backups)} backup(s), {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--path', default='./backups', help='Backup directory (default: ./backups)')
+@click.option('--dict-size', default=131072, help='Dictionary size in bytes (default: 128 KiB)')
+def train_dict(path, dict_size):
+    """Train a zstd dictionary from existing backups to boost compression."""
+
+    if zstd is None:
+        click.echo(f"{Fore.RED}✗ zstandard is not installed")
+        sys.exit(1)
+
+    backup_manager = BackupManager(path)
+
+    # Collect decompressed configs as training samples
+    samples = []
+    for backup in backup_manager.list_backups():
+        config_file = backup.get('config_file')
+        if not config_file:
+            continue
+        try:
+            with open(config_file, 'rb') as f:
+                data = f.read()
+            if config_file.endswith('.zst'):
+                max_size = backup.get('file_size', 0) or (1 << 26)
+                data = backup_manager._decompressor(Path(config_file)).decompress(data, max_output_size=max_size)
+            samples.append(data)
+        except Exception as e:
+            logger.warning(f"Skipping training sample {config_file}: {str(e)}")
+
+    if not samples:
+        click.echo(f"{Fore.YELLOW}No backups found to train on in: {path}")
+        sys.exit(1)
+
+    try:
+        dictionary = zstd.train_dictionary(dict_size, samples)
+    except zstd.ZstdError as e:
+        click.echo(f"{Fore.RED}✗ Dictionary training failed: {str(e)}")
+        sys.exit(1)
+
+    dict_path = backup_manager.base_path / BackupManager.DICT_FILENAME
+    dict_path.write_bytes(dictionary.as_bytes())
+    click.echo(f"{Fore.GREEN}✓ Dictionary trained from {len(samples)} backup(s): {dict_path}")
+    click.echo(f"{Fore.CYAN}  New backups in {path} will be compressed with it")
+
+
 @cli.command()
 @click.option('--host', required=True, help='Fortinet device IP address')
 @click.option('--username', required=True, help='Username for SSH connection')